@@ -1,30 +1,92 @@
 import os
 import sys
 import json
+import re
 import time
+import shutil
+import queue
+import atexit
 import logging
+from logging.handlers import QueueHandler, QueueListener
+import contextlib
+from collections import defaultdict
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional, Union
+from typing import Dict, List, NamedTuple, Tuple, Optional, Union
 from urllib.parse import urlparse
 import requests
 from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
 from urllib3.util.retry import Retry
 from HdRezkaApi import HdRezkaApi
 from HdRezkaApi.types import TVSeries, Movie
 from tqdm import tqdm
+from tqdm.utils import CallbackIOWrapper
 from colorama import init, Fore, Style
 import concurrent.futures
-from threading import Lock
+from threading import Event, Lock, Thread
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Инициализация colorama
 init()
 
-# Настройка логирования
+# Шаблоны цветного вывода, собранные один раз при импорте
+MENU_HEADER_FORMAT = f"{Fore.MAGENTA}{{}}{Style.RESET_ALL}"
+MENU_ITEM_FORMAT = f"{Fore.GREEN}[{{}}] {{}}{Style.RESET_ALL}"
+ERROR_FORMAT = f"{Fore.RED}{{}}{Style.RESET_ALL}"
+WARNING_FORMAT = f"{Fore.YELLOW}{{}}{Style.RESET_ALL}"
+SUCCESS_FORMAT = f"{Fore.GREEN}{{}}{Style.RESET_ALL}"
+INFO_FORMAT = f"{Fore.BLUE}{{}}{Style.RESET_ALL}"
+STATUS_FORMAT = f"{Fore.CYAN}{{}}{Style.RESET_ALL}"
+PROMPT_FORMAT = f"\n{Fore.YELLOW}{{}}{Style.RESET_ALL}"
+INVALID_NUMBER_MESSAGE = ERROR_FORMAT.format("Введите корректное число")
+INTERRUPTED_MESSAGE = WARNING_FORMAT.format("\nОперация прервана пользователем")
+
+# ANSI-последовательность очистки экрана вместо запуска cls/clear через
+# оболочку; на Windows её поддержку включает colorama.init()
+CLEAR_SEQUENCE = '\x1b[2J\x1b[H'
+
+# Таблица замены недопустимых в именах файлов символов
+FILENAME_TRANSLATION = str.maketrans({char: '_' for char in '<>:"/\\|?*'})
+
+# Приоритеты качества и регулярное выражение, находящее их за один проход
+QUALITY_PRIORITIES = {
+    '2160p': 5, '4K': 5,
+    '1440p': 4, '2K': 4,
+    '1080p': 3, 'FHD': 3,
+    '720p': 2, 'HD': 2,
+    '480p': 1, 'SD': 1,
+    '360p': 0
+}
+QUALITY_PATTERN = re.compile('|'.join(map(re.escape, QUALITY_PRIORITIES)))
+
+# HdRezkaApi не гарантирует потокобезопасность getStream,
+# поэтому запросы потоков из рабочих потоков выполняются по очереди.
+# Ограничение: getStream делает requests.post без таймаута и не дает
+# его задать, так что зависший запрос к API держит блокировку и
+# останавливает получение потоков во всех рабочих потоках
+stream_lock = Lock()
+
+# Устанавливается при Ctrl+C: идущие загрузки проверяют его после
+# каждого прочитанного блока и прерываются, не дожидаясь конца файла
+download_cancelled = Event()
+
+# Настройка логирования: запись в файл идет через очередь в фоновом
+# потоке, чтобы медленный диск не тормозил потоки скачивания
+log_queue = queue.Queue()
+log_listener = QueueListener(log_queue, logging.FileHandler('hdrezka_downloader.log'))
+log_listener.start()
+atexit.register(log_listener.stop)
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler('hdrezka_downloader.log'),
+        QueueHandler(log_queue),
         logging.StreamHandler()
     ]
 )
@@ -34,9 +96,45 @@ logger = logging.getLogger(__name__)
 DEFAULT_DOWNLOAD_DIR = "Videos"
 CONFIG_FILE = "downloader_config.json"
 MAX_RETRIES = 3
-CHUNK_SIZE = 8192
-TIMEOUT = 30
+CHUNK_SIZE = 1024 * 1024
+WRITE_BUFFER_SIZE = 1024 * 1024
+PROGRESS_INTERVAL = 0.5
+PROGRESS_UPDATE_BYTES = 4 * 1024 * 1024
+PART_SUFFIX = ".part"
+CONNECT_TIMEOUT = 10
+TIMEOUT = 60
 MAX_WORKERS = 4
+# Значения по умолчанию из прошлых версий: они записаны в старые файлы
+# конфигурации и не должны перекрывать новые значения по умолчанию
+LEGACY_DEFAULTS = {'chunk_size': 8192, 'timeout': 30}
+# Коды, которыми CDN отвечает на просроченную подписанную ссылку
+EXPIRED_LINK_STATUSES = (403, 410)
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+)
+
+# Ошибки сети, после которых загрузку имеет смысл повторить. Исключения
+# urllib3 нужны, так как response.raw читается в обход обёрток requests
+NETWORK_ERRORS = (
+    requests.exceptions.Timeout,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.ChunkedEncodingError,
+    ProtocolError,
+    ReadTimeoutError
+)
+
+def dump_json(data: Dict) -> bytes:
+    """Сериализация в JSON одним буфером (через orjson, если установлен)"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
+def load_json(raw: bytes) -> Dict:
+    """Разбор JSON (через orjson, если установлен)"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
 
 class DownloadConfig:
     """Конфигурация для скачивания"""
@@ -49,38 +147,113 @@ class DownloadConfig:
         self.preferred_quality = None
         self.preferred_translator = None
         self.auto_select_single_option = True
+        # Содержимое файла конфигурации на момент последнего чтения/записи
+        self._saved_snapshot = None
         
+    def _as_dict(self) -> Dict:
+        """Настройки в том виде, в котором они хранятся в файле"""
+        return {
+            'download_dir': self.download_dir,
+            'max_retries': self.max_retries,
+            'chunk_size': self.chunk_size,
+            'timeout': self.timeout,
+            'max_workers': self.max_workers,
+            'preferred_quality': self.preferred_quality,
+            'preferred_translator': self.preferred_translator,
+            'auto_select_single_option': self.auto_select_single_option
+        }
+    
     def load_config(self):
         """Загрузка конфигурации из файла"""
         try:
             if os.path.exists(CONFIG_FILE):
-                with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-                    config_data = json.load(f)
-                    for key, value in config_data.items():
-                        if hasattr(self, key):
-                            setattr(self, key, value)
+                with open(CONFIG_FILE, 'rb') as f:
+                    config_data = load_json(f.read())
+                known_keys = self._as_dict().keys()
+                for key, value in config_data.items():
+                    if key in known_keys and LEGACY_DEFAULTS.get(key) != value:
+                        setattr(self, key, value)
+                self._saved_snapshot = config_data
                 logger.info("Конфигурация загружена из файла")
         except Exception as e:
-            logger.warning(f"Не удалось загрузить конфигурацию: {e}")
+            logger.warning("Не удалось загрузить конфигурацию: %s", e)
     
     def save_config(self):
-        """Сохранение конфигурации в файл"""
+        """Сохранение конфигурации в файл (только если она изменилась)"""
         try:
-            config_data = {
-                'download_dir': self.download_dir,
-                'max_retries': self.max_retries,
-                'chunk_size': self.chunk_size,
-                'timeout': self.timeout,
-                'max_workers': self.max_workers,
-                'preferred_quality': self.preferred_quality,
-                'preferred_translator': self.preferred_translator,
-                'auto_select_single_option': self.auto_select_single_option
-            }
-            with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-                json.dump(config_data, f, indent=2, ensure_ascii=False)
+            config_data = self._as_dict()
+            if config_data == self._saved_snapshot:
+                return
+            
+            # Пишем во временный файл и атомарно подменяем,
+            # чтобы сбой посреди записи не испортил конфигурацию
+            tmp_file = CONFIG_FILE + '.tmp'
+            with open(tmp_file, 'wb') as f:
+                f.write(dump_json(config_data))
+            os.replace(tmp_file, CONFIG_FILE)
+            self._saved_snapshot = config_data
             logger.info("Конфигурация сохранена в файл")
         except Exception as e:
-            logger.warning(f"Не удалось сохранить конфигурацию: {e}")
+            logger.warning("Не удалось сохранить конфигурацию: %s", e)
+
+@dataclass
+class DownloadPlan:
+    """План скачивания: что, в какой озвучке и качестве, куда сохранять"""
+    rezka: HdRezkaApi
+    translator_id: str
+    quality: str
+    folder_path: Path
+    episodes: List[Tuple[int, int]]
+
+class DownloadResult(NamedTuple):
+    """Итог скачивания; retryable - сбой сети, после которого стоит докачать,
+    link_expired - ссылка на поток устарела и её нужно получить заново"""
+    success: bool
+    message: str
+    retryable: bool = False
+    link_expired: bool = False
+
+class DownloadCancelled(Exception):
+    """Скачивание прервано пользователем"""
+
+class ProgressBatcher:
+    """Копит прирост прогресса и передает его в tqdm крупными порциями"""
+    
+    def __init__(self, pbar: tqdm, step: int = PROGRESS_UPDATE_BYTES):
+        self.pbar = pbar
+        self.step = step
+        self.pending = 0
+    
+    def __call__(self, n: int):
+        if download_cancelled.is_set():
+            raise DownloadCancelled("Скачивание прервано пользователем")
+        self.pending += n
+        if self.pending >= self.step:
+            self.flush()
+    
+    def flush(self):
+        """Передает накопленный прирост в прогресс-бар"""
+        if self.pending:
+            self.pbar.update(self.pending)
+            self.pending = 0
+
+def content_range_total(response: requests.Response) -> int:
+    """Полный размер файла из заголовка Content-Range (0 если неизвестен)"""
+    total = response.headers.get('content-range', '').rpartition('/')[2]
+    return int(total) if total.isdigit() else 0
+
+def drop_page_cache(f):
+    """Просит ядро не держать записанное видео в кэше страниц"""
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        # DONTNEED не вытесняет грязные страницы: сначала сбрасываем
+        # буфер файла и дожидаемся записи данных на диск
+        f.flush()
+        os.fdatasync(f.fileno())
+        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+    except OSError as e:
+        logger.debug("posix_fadvise не поддерживается: %s", e)
 
 class DownloadManager:
     """Менеджер скачивания с улучшенной обработкой ошибок и параллельностью"""
@@ -89,6 +262,7 @@ class DownloadManager:
         self.config = config
         self.session = self._create_session()
         self.download_lock = Lock()
+        self._known_dirs = set()
         self.stats = {
             'total_downloads': 0,
             'successful_downloads': 0,
@@ -97,76 +271,228 @@ class DownloadManager:
         }
     
     def _create_session(self) -> requests.Session:
-        """Создание сессии с повторными попытками"""
+        """Создание сессии с повторными попытками и пулом соединений"""
         session = requests.Session()
+        # Видео уже сжато: просим отдавать его как есть, тогда не работает
+        # потоковый декодер, а Content-Length совпадает с размером файла
+        session.headers.update({
+            'User-Agent': USER_AGENT,
+            'Connection': 'keep-alive',
+            'Accept-Encoding': 'identity'
+        })
+        # Одна сессия на весь запуск: эпизоды обычно идут с одного CDN,
+        # поэтому keep-alive соединения переиспользуются без нового TLS.
+        # Запас в пуле на прогрев и соединения с другими хостами CDN
+        pool_maxsize = max(1, int(self.config.max_workers)) * 2
         retry_strategy = Retry(
             total=self.config.max_retries,
             backoff_factor=1,
             status_forcelist=[429, 500, 502, 503, 504],
             allowed_methods=["HEAD", "GET", "OPTIONS"]
         )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        adapter = HTTPAdapter(
+            max_retries=retry_strategy,
+            pool_connections=pool_maxsize,
+            pool_maxsize=pool_maxsize,
+            pool_block=False
+        )
         session.mount("http://", adapter)
         session.mount("https://", adapter)
         return session
     
-    def download_file(self, url: str, filepath: str, description: str = "") -> Tuple[bool, str]:
-        """Скачивание файла с прогресс-баром"""
+    def warm_up(self, url: str):
+        """Заранее открывает соединение с CDN, чтобы оно ждало в пуле"""
+        try:
+            self.session.head(url, allow_redirects=True, timeout=self.request_timeout)
+        except requests.exceptions.RequestException as e:
+            logger.debug("Не удалось прогреть соединение: %s", e)
+    
+    @property
+    def request_timeout(self) -> Tuple[int, int]:
+        """Таймауты (подключение, чтение): зависший CDN не блокирует очередь"""
+        return CONNECT_TIMEOUT, self.config.timeout
+    
+    def close(self):
+        """Закрытие сессии и всех соединений пула"""
+        self.session.close()
+    
+    def download_file(self, url: str, filepath: str, description: str = "",
+                      leave: bool = True, source_id: str = "") -> DownloadResult:
+        """Скачивание файла с прогресс-баром
+
+        source_id попадает в имя .part файла, чтобы не докачивать
+        в него данные другого видео (например, другой озвучки)
+        """
+        # Счетчики копим в локальных переменных и переносим в общую
+        # статистику под блокировкой один раз на файл
+        bytes_written = 0
+        downloaded = False
+        succeeded = False
         try:
-            # Проверяем, существует ли файл
+            # Готовый файл появляется только после полной загрузки,
+            # поэтому его наличие означает, что скачивать нечего
             if os.path.exists(filepath):
-                logger.info(f"Файл уже существует: {filepath}")
-                return True, "Файл уже существует"
+                logger.info("Файл уже существует: %s", filepath)
+                succeeded = True
+                return DownloadResult(True, "Файл уже существует")
             
-            # Создаем директорию если не существует
-            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+            # Создаем директорию если не существует (один раз на папку)
+            directory = os.path.dirname(filepath)
+            if directory not in self._known_dirs:
+                os.makedirs(directory, exist_ok=True)
+                self._known_dirs.add(directory)
             
-            # Получаем заголовки для определения размера
-            head_response = self.session.head(url, timeout=self.config.timeout)
-            head_response.raise_for_status()
+            # Недокачанные данные хранятся в .part рядом с итоговым файлом
+            part_path = f"{filepath}.{source_id}{PART_SUFFIX}" if source_id else filepath + PART_SUFFIX
             
-            total_size = int(head_response.headers.get('content-length', 0))
+            # Размер берем из заголовков самого GET, без отдельного HEAD
+            existing_size = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            headers = {'Range': f'bytes={existing_size}-'} if existing_size else {}
+            response = self.session.get(url, stream=True, headers=headers, timeout=self.request_timeout)
+            
+            if existing_size and response.status_code == 416:
+                # Запрошенный диапазон за концом файла
+                response.close()
+                if content_range_total(response) == existing_size:
+                    os.replace(part_path, filepath)
+                    logger.info("Файл уже существует: %s", filepath)
+                    succeeded = True
+                    return DownloadResult(True, "Файл уже существует")
+                
+                # Локальный файл не совпадает с удаленным - качаем заново
+                existing_size = 0
+                response = self.session.get(url, stream=True, timeout=self.request_timeout)
             
-            # Скачиваем файл
-            response = self.session.get(url, stream=True, timeout=self.config.timeout)
             response.raise_for_status()
             
-            with open(filepath, 'wb') as f:
-                with tqdm(
-                    desc=description or os.path.basename(filepath),
-                    total=total_size,
-                    unit='B',
-                    unit_scale=True,
-                    unit_divisor=1024,
-                    colour='green'
-                ) as pbar:
-                    for chunk in response.iter_content(chunk_size=self.config.chunk_size):
-                        if chunk:
-                            f.write(chunk)
-                            pbar.update(len(chunk))
-                            
-                            with self.download_lock:
-                                self.stats['total_bytes'] += len(chunk)
+            if existing_size and response.status_code == 206:
+                # Докачиваем недостающую часть
+                total_size = content_range_total(response)
+            else:
+                total_size = int(response.headers.get('content-length', 0))
+                if existing_size and existing_size == total_size:
+                    response.close()
+                    os.replace(part_path, filepath)
+                    logger.info("Файл уже существует: %s", filepath)
+                    succeeded = True
+                    return DownloadResult(True, "Файл уже существует")
+                
+                # Сервер не поддерживает Range - качаем заново
+                existing_size = 0
+            
+            # Открываем через os.open, чтобы докачка не обнуляла файл,
+            # а новая загрузка начиналась с пустого
+            flags = os.O_WRONLY | os.O_CREAT | getattr(os, 'O_BINARY', 0)
+            if not existing_size:
+                flags |= os.O_TRUNC
+            fd = os.open(part_path, flags, 0o644)
+            with os.fdopen(fd, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+                # Место заранее не резервируем: после аварийного завершения
+                # размер .part должен совпадать с реально полученными байтами,
+                # иначе докачка примет заполненный нулями файл за полный
+                f.seek(existing_size)
+                try:
+                    # Копируем сырой поток напрямую в файл: copyfileobj крутит
+                    # цикл в C без промежуточного генератора iter_content.
+                    # os.sendfile/os.splice здесь не применимы: sendfile в Linux
+                    # не читает из сокета, через TLS байты в любом случае
+                    # расшифровываются в user space, а urllib3 уже держит
+                    # часть тела ответа в своем буфере
+                    response.raw.decode_content = True
+                    with tqdm(
+                        desc=description or os.path.basename(filepath),
+                        total=total_size,
+                        initial=existing_size,
+                        unit='B',
+                        unit_scale=True,
+                        unit_divisor=1024,
+                        colour='green',
+                        leave=leave,
+                        mininterval=PROGRESS_INTERVAL,
+                        disable=not sys.stderr.isatty()
+                    ) as pbar:
+                        progress = ProgressBatcher(pbar)
+                        raw = CallbackIOWrapper(progress, response.raw, 'read')
+                        try:
+                            shutil.copyfileobj(raw, f, length=self.config.chunk_size)
+                        finally:
+                            progress.flush()
+                finally:
+                    file_size = f.tell()
+                    drop_page_cache(f)
+                    bytes_written = file_size - existing_size
             
-            with self.download_lock:
-                self.stats['successful_downloads'] += 1
+            if total_size and file_size != total_size:
+                # Соединение закрылось раньше времени - докачаем при повторе
+                message = f"Файл скачан не полностью: получено {file_size} из {total_size} байт"
+                logger.warning("%s: %s", message, filepath)
+                return DownloadResult(False, message, retryable=True)
             
-            logger.info(f"Файл успешно скачан: {filepath}")
-            return True, "Успешно"
+            os.replace(part_path, filepath)
+            downloaded = succeeded = True
             
+            logger.info("Файл успешно скачан: %s", filepath)
+            return DownloadResult(True, "Успешно")
+            
+        except DownloadCancelled as e:
+            logger.info("Скачивание прервано: %s", filepath)
+            return DownloadResult(False, str(e))
+        except NETWORK_ERRORS as e:
+            logger.warning("Таймаут или обрыв соединения при скачивании %s: %s", url, e)
+            return DownloadResult(False, f"Таймаут/ошибка сети: {e}", retryable=True)
+        except requests.exceptions.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            logger.error("Ошибка HTTP при скачивании %s: %s", url, e)
+            return DownloadResult(False, f"Ошибка сети: {e}",
+                                  link_expired=status in EXPIRED_LINK_STATUSES)
         except requests.exceptions.RequestException as e:
-            logger.error(f"Ошибка сети при скачивании {url}: {e}")
-            return False, f"Ошибка сети: {e}"
+            logger.error("Ошибка сети при скачивании %s: %s", url, e)
+            return DownloadResult(False, f"Ошибка сети: {e}")
         except Exception as e:
-            logger.error(f"Общая ошибка при скачивании {url}: {e}")
-            return False, f"Ошибка: {e}"
+            logger.error("Общая ошибка при скачивании %s: %s", url, e)
+            return DownloadResult(False, f"Ошибка: {e}")
         finally:
             with self.download_lock:
                 self.stats['total_downloads'] += 1
+                self.stats['total_bytes'] += bytes_written
+                if downloaded:
+                    self.stats['successful_downloads'] += 1
+                if not succeeded:
+                    self.stats['failed_downloads'] += 1
+
+def get_stream(rezka: HdRezkaApi, translator_id: str,
+               season: Optional[int] = None, episode: Optional[int] = None):
+    """Получение потока с кэшем на объекте rezka, чтобы не повторять запросы к API"""
+    key = (translator_id, season, episode)
+    with stream_lock:
+        cache = getattr(rezka, '_stream_cache', None)
+        if cache is None:
+            cache = rezka._stream_cache = {}
+        
+        stream = cache.get(key)
+        if stream is None:
+            stream = rezka.getStream(season, episode, translation=translator_id)
+            if stream:
+                cache[key] = stream
+    return stream
+
+def discard_stream(rezka: HdRezkaApi, translator_id: str,
+                   season: Optional[int] = None, episode: Optional[int] = None):
+    """Удаление потока из кэша, когда он больше не понадобится"""
+    with stream_lock:
+        getattr(rezka, '_stream_cache', {}).pop((translator_id, season, episode), None)
 
 def clear_console():
     """Очищает консоль"""
-    os.system('cls' if os.name == 'nt' else 'clear')
+    if not sys.stdout.isatty():
+        return
+    sys.stdout.write(CLEAR_SEQUENCE)
+    sys.stdout.flush()
+
+def print_lines(lines: List[str]):
+    """Выводит блок строк одной записью в stdout"""
+    sys.stdout.write('\n'.join(lines) + '\n')
+    sys.stdout.flush()
 
 def get_user_choice(prompt: str, max_value: int) -> int:
     """Получает выбор пользователя с валидацией"""
@@ -176,64 +502,51 @@ def get_user_choice(prompt: str, max_value: int) -> int:
             if 0 <= choice <= max_value:
                 return choice
             else:
-                print(f"{Fore.RED}Введите число от 0 до {max_value}{Style.RESET_ALL}")
+                print(ERROR_FORMAT.format(f"Введите число от 0 до {max_value}"))
         except ValueError:
-            print(f"{Fore.RED}Введите корректное число{Style.RESET_ALL}")
+            print(INVALID_NUMBER_MESSAGE)
         except KeyboardInterrupt:
-            print(f"\n{Fore.YELLOW}Операция прервана пользователем{Style.RESET_ALL}")
+            print(INTERRUPTED_MESSAGE)
             sys.exit(0)
 
 def sanitize_filename(filename: str) -> str:
     """Очищает имя файла от недопустимых символов"""
-    invalid_chars = '<>:"/\\|?*'
-    for char in invalid_chars:
-        filename = filename.replace(char, '_')
-    return filename.strip()
+    return filename.translate(FILENAME_TRANSLATION).strip()
 
 def get_quality_priority(quality: str) -> int:
     """Возвращает приоритет качества для сортировки"""
-    quality_map = {
-        '2160p': 5, '4K': 5,
-        '1440p': 4, '2K': 4,
-        '1080p': 3, 'FHD': 3,
-        '720p': 2, 'HD': 2,
-        '480p': 1, 'SD': 1,
-        '360p': 0
-    }
-    
-    for key, value in quality_map.items():
-        if key in quality:
-            return value
-    return 0
+    return max((QUALITY_PRIORITIES[key] for key in QUALITY_PATTERN.findall(quality)), default=0)
 
 def select_translator(translators: Dict, config: DownloadConfig, auto_select: bool = True) -> str:
     """Выбор переводчика с учетом предпочтений"""
     if not translators:
         raise ValueError("Нет доступных переводчиков")
     
+    translator_list = list(translators.items())
+    
     # Если только один переводчик и включено автовыбор
     if len(translators) == 1 and auto_select:
-        translator_id = list(translators.keys())[0]
-        translator_name = translators[translator_id].get("name", "Без названия")
-        print(f"{Fore.BLUE}Автоматически выбран перевод: {translator_name}{Style.RESET_ALL}")
+        translator_id, translator = translator_list[0]
+        translator_name = translator.get("name", "Без названия")
+        print(INFO_FORMAT.format(f"Автоматически выбран перевод: {translator_name}"))
         return translator_id
     
     # Проверяем предпочтительный переводчик
     if config.preferred_translator:
-        for tid, data in translators.items():
+        for tid, data in translator_list:
             if config.preferred_translator in data.get("name", ""):
-                print(f"{Fore.BLUE}Выбран предпочтительный перевод: {data.get('name', 'Без названия')}{Style.RESET_ALL}")
+                print(INFO_FORMAT.format(f"Выбран предпочтительный перевод: {data.get('name', 'Без названия')}"))
                 return tid
     
     # Показываем список для выбора
-    print(f"{Fore.MAGENTA}Доступные озвучки:{Style.RESET_ALL}")
-    translator_list = list(translators.items())
+    lines = [MENU_HEADER_FORMAT.format("Доступные озвучки:")]
     for i, (tid, translator) in enumerate(translator_list, 1):
         name = translator.get("name", "Без названия")
         premium_status = " (Премиум)" if translator.get("premium") else ""
-        print(f"{Fore.GREEN}[{i}] {name}{premium_status}{Style.RESET_ALL}")
+        lines.append(MENU_ITEM_FORMAT.format(i, f"{name}{premium_status}"))
+    print_lines(lines)
     
-    choice = get_user_choice(f"\n{Fore.YELLOW}Введите номер озвучки: {Style.RESET_ALL}", len(translator_list))
+    choice = get_user_choice(PROMPT_FORMAT.format("Введите номер озвучки: "), len(translator_list))
     return translator_list[choice - 1][0]
 
 def select_quality(qualities: List[str], config: DownloadConfig, auto_select: bool = True) -> str:
@@ -241,25 +554,27 @@ def select_quality(qualities: List[str], config: DownloadConfig, auto_select: bo
     if not qualities:
         raise ValueError("Нет доступных качеств")
     
-    # Сортируем качества по приоритету
+    # Сортируем качества по приоритету. sorted вызывает key один раз на
+    # элемент (decorate-sort-undecorate внутри), а сортировка устойчива,
+    # поэтому качества с равным приоритетом сохраняют порядок из API
     sorted_qualities = sorted(qualities, key=get_quality_priority, reverse=True)
     
     # Если только одно качество и включено автовыбор
     if len(sorted_qualities) == 1 and auto_select:
-        print(f"{Fore.BLUE}Автоматически выбрано качество: {sorted_qualities[0]}{Style.RESET_ALL}")
+        print(INFO_FORMAT.format(f"Автоматически выбрано качество: {sorted_qualities[0]}"))
         return sorted_qualities[0]
     
     # Проверяем предпочтительное качество
     if config.preferred_quality and config.preferred_quality in qualities:
-        print(f"{Fore.BLUE}Выбрано предпочтительное качество: {config.preferred_quality}{Style.RESET_ALL}")
+        print(INFO_FORMAT.format(f"Выбрано предпочтительное качество: {config.preferred_quality}"))
         return config.preferred_quality
     
     # Показываем список для выбора
-    print(f"{Fore.MAGENTA}Доступные качества:{Style.RESET_ALL}")
-    for i, quality in enumerate(sorted_qualities, 1):
-        print(f"{Fore.GREEN}[{i}] {quality}{Style.RESET_ALL}")
+    lines = [MENU_HEADER_FORMAT.format("Доступные качества:")]
+    lines += [MENU_ITEM_FORMAT.format(i, quality) for i, quality in enumerate(sorted_qualities, 1)]
+    print_lines(lines)
     
-    choice = get_user_choice(f"\n{Fore.YELLOW}Введите номер качества: {Style.RESET_ALL}", len(sorted_qualities))
+    choice = get_user_choice(PROMPT_FORMAT.format("Введите номер качества: "), len(sorted_qualities))
     return sorted_qualities[choice - 1]
 
 def process_movie(rezka: HdRezkaApi, config: DownloadConfig, download_manager: DownloadManager, 
@@ -278,7 +593,7 @@ def process_movie(rezka: HdRezkaApi, config: DownloadConfig, download_manager: D
         translator_id = select_translator(translations, config)
         
         # Получаем поток для фильма (без указания сезона и эпизода)
-        stream = rezka.getStream(translation=translator_id)
+        stream = get_stream(rezka, translator_id)
         if not stream or not hasattr(stream, 'videos'):
             logger.error("Не удалось получить поток для фильма")
             return False
@@ -289,7 +604,7 @@ def process_movie(rezka: HdRezkaApi, config: DownloadConfig, download_manager: D
         
         # Получаем URL для скачивания
         if selected_quality not in stream.videos:
-            logger.error(f"Качество '{selected_quality}' недоступно")
+            logger.error("Качество '%s' недоступно", selected_quality)
             return False
         
         video_url = stream.videos[selected_quality][0]
@@ -304,196 +619,340 @@ def process_movie(rezka: HdRezkaApi, config: DownloadConfig, download_manager: D
         filepath = folder_path / filename
         
         # Скачиваем
-        print(f"{Fore.CYAN}Скачивание фильма: {movie_title}{Style.RESET_ALL}")
-        success, message = download_manager.download_file(
-            video_url, str(filepath), f"{safe_title} ({selected_quality})"
-        )
+        print(STATUS_FORMAT.format(f"Скачивание фильма: {movie_title}"))
+        description = f"{safe_title} ({selected_quality})"
+        source_id = sanitize_filename(str(translator_id))
+        refreshed = False
+        # Сетевые сбои повторяем: каждая попытка докачивает .part файл
+        for retry in range(config.max_retries + 1):
+            if retry:
+                print(WARNING_FORMAT.format(f"Повторная попытка {retry}/{config.max_retries}"))
+            result = download_manager.download_file(
+                video_url, str(filepath), description, source_id=source_id
+            )
+            if result.link_expired and not refreshed:
+                # Подписанная ссылка истекла, пока пользователь выбирал качество
+                refreshed = True
+                discard_stream(rezka, translator_id)
+                stream = get_stream(rezka, translator_id)
+                if stream and selected_quality in stream.videos:
+                    video_url = stream.videos[selected_quality][0]
+                    result = download_manager.download_file(
+                        video_url, str(filepath), description, source_id=source_id
+                    )
+            if not result.retryable:
+                break
         
-        if success:
-            print(f"{Fore.GREEN}Фильм успешно скачан: {filename}{Style.RESET_ALL}")
+        if result.success:
+            print(SUCCESS_FORMAT.format(f"Фильм успешно скачан: {filename}"))
             return True
         else:
-            logger.error(f"Ошибка скачивания фильма: {message}")
+            logger.error("Ошибка скачивания фильма: %s", result.message)
             return False
             
     except Exception as e:
-        logger.error(f"Ошибка при обработке фильма: {e}")
+        logger.error("Ошибка при обработке фильма: %s", e)
         return False
 
-def process_series(rezka: HdRezkaApi, config: DownloadConfig, download_manager: DownloadManager, 
-                  series_title: str) -> bool:
-    """Обработка сериала с улучшенной логикой"""
-    try:
-        # Получаем информацию о сериале
-        if not hasattr(rezka, 'seriesInfo') or not rezka.seriesInfo:
-            logger.error("Нет информации о сериале")
-            return False
-        
-        # Собираем информацию о сезонах и эпизодах
-        all_seasons = {}
-        for translator_id, data in rezka.seriesInfo.items():
-            episodes = data.get('episodes', {})
-            for season_num, season_episodes in episodes.items():
-                if season_num not in all_seasons:
-                    all_seasons[season_num] = set()
-                all_seasons[season_num].update(season_episodes.keys())
-        
-        # Конвертируем в отсортированные списки
-        for season in all_seasons:
-            all_seasons[season] = sorted(all_seasons[season])
-        
-        # Выбор сезона/эпизода
-        sorted_seasons = sorted(all_seasons.keys())
-        
-        print(f"{Fore.MAGENTA}Доступные сезоны:{Style.RESET_ALL}")
-        print(f"{Fore.GREEN}[0] Все сезоны{Style.RESET_ALL}")
-        for i, season in enumerate(sorted_seasons, 1):
-            episode_count = len(all_seasons[season])
-            print(f"{Fore.GREEN}[{i}] Сезон {season} ({episode_count} эпизодов){Style.RESET_ALL}")
-        
-        season_choice = get_user_choice(f"\n{Fore.YELLOW}Выберите сезон: {Style.RESET_ALL}", len(sorted_seasons))
+def download_episode(rezka: HdRezkaApi, download_manager: DownloadManager, translator_id: str,
+                     quality: str, folder_path: Path, season: int, episode: int) -> DownloadResult:
+    """Скачивание одного эпизода сериала"""
+    filename = f"S{season:02d}E{episode:02d}_{quality}.mp4"
+    filepath = folder_path / filename
+    
+    for refresh in (False, True):
+        if refresh:
+            # Кэшированная подписанная ссылка истекла - запрашиваем новую
+            discard_stream(rezka, translator_id, season, episode)
         
-        # Определяем эпизоды для скачивания
-        episodes_to_download = []
+        # Получаем поток для эпизода, повторно используя уже полученные
+        stream = get_stream(rezka, translator_id, season, episode)
+        if not stream or quality not in stream.videos:
+            return DownloadResult(False, "Поток недоступен")
         
-        if season_choice == 0:
-            # Все сезоны
-            for season in sorted_seasons:
-                for episode in all_seasons[season]:
-                    episodes_to_download.append((season, episode))
-        else:
-            # Конкретный сезон
-            selected_season = sorted_seasons[season_choice - 1]
-            season_episodes = all_seasons[selected_season]
-            
-            print(f"{Fore.MAGENTA}Эпизоды сезона {selected_season}:{Style.RESET_ALL}")
-            print(f"{Fore.GREEN}[0] Все эпизоды{Style.RESET_ALL}")
-            for i, episode in enumerate(season_episodes, 1):
-                print(f"{Fore.GREEN}[{i}] Эпизод {episode}{Style.RESET_ALL}")
-            
-            episode_choice = get_user_choice(f"\n{Fore.YELLOW}Выберите эпизод: {Style.RESET_ALL}", len(season_episodes))
-            
-            if episode_choice == 0:
-                # Все эпизоды сезона
-                for episode in season_episodes:
-                    episodes_to_download.append((selected_season, episode))
-            else:
-                # Конкретный эпизод
-                selected_episode = season_episodes[episode_choice - 1]
-                episodes_to_download.append((selected_season, selected_episode))
-        
-        # Находим подходящие переводчики
-        valid_translators = {}
-        for tid, data in rezka.seriesInfo.items():
-            translator_episodes = data.get('episodes', {})
-            has_all_episodes = True
-            
-            for season, episode in episodes_to_download:
-                if season not in translator_episodes or episode not in translator_episodes[season]:
-                    has_all_episodes = False
-                    break
+        result = download_manager.download_file(
+            stream.videos[quality][0], str(filepath), f"S{season}E{episode}", leave=False,
+            source_id=sanitize_filename(str(translator_id))
+        )
+        if not result.link_expired:
+            break
+    
+    if result.success:
+        # Поток нужен только для повторных попыток - после успеха освобождаем
+        discard_stream(rezka, translator_id, season, episode)
+    return result
+
+def download_episodes(rezka: HdRezkaApi, config: DownloadConfig, download_manager: DownloadManager,
+                      translator_id: str, quality: str, folder_path: Path,
+                      episodes: List[Tuple[int, int]]) -> Tuple[int, List]:
+    """Скачивание набора эпизодов, возвращает число успешных и список неудачных"""
+    def attempt(season: int, episode: int) -> Optional[Tuple[int, int, str, bool]]:
+        """Одна попытка скачивания; None при успехе, иначе описание ошибки"""
+        if download_cancelled.is_set():
+            return season, episode, "Скачивание прервано пользователем", False
+        try:
+            result = download_episode(
+                rezka, download_manager, translator_id,
+                quality, folder_path, season, episode
+            )
+        except NETWORK_ERRORS as e:
+            # Сбой запроса к API hdrezka при получении потока тоже временный
+            result = DownloadResult(False, f"Таймаут/ошибка сети: {e}", retryable=True)
+        except Exception as e:
+            result = DownloadResult(False, str(e))
+        return None if result.success else (season, episode, result.message, result.retryable)
+    
+    max_workers = max(1, min(int(config.max_workers), len(episodes)))
+    # Флаг мог остаться от прерванного ранее скачивания
+    download_cancelled.clear()
+    
+    # Эпизоды независимы, поэтому качаем их параллельно:
+    # ожидание сети одного эпизода перекрывается загрузкой других
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    
+    def run_round(batch: List[Tuple[int, int]], desc: str) -> List[Tuple[int, int, str, bool]]:
+        """Скачивание пачки эпизодов, возвращает список неудачных"""
+        futures = [executor.submit(attempt, season, episode) for season, episode in batch]
+        completed = tqdm(
+            concurrent.futures.as_completed(futures),
+            total=len(futures),
+            desc=desc,
+            unit='эп',
+            colour='cyan',
+            disable=not sys.stderr.isatty()
+        )
+        return sorted(filter(None, (future.result() for future in completed)))
+    
+    failed_downloads = []
+    pending = list(episodes)
+    interrupted = False
+    try:
+        for retry in range(config.max_retries + 1):
+            if retry:
+                print(WARNING_FORMAT.format(f"Повторная попытка {retry}/{config.max_retries} "
+                                            f"для {len(pending)} эпизодов"))
+            failed = run_round(pending, "Эпизоды" if not retry else f"Повтор {retry}")
             
-            if has_all_episodes:
-                valid_translators[tid] = data
-        
-        if not valid_translators:
-            logger.error("Нет переводчиков с необходимыми эпизодами")
-            return False
-        
-        # Преобразуем формат для функции select_translator
-        formatted_translators = {}
-        for tid, data in valid_translators.items():
-            formatted_translators[tid] = {
-                "name": data.get("translator_name", "Без названия"),
-                "premium": data.get("premium", False)
-            }
+            # Сетевые сбои и таймауты повторяем (файл будет докачан),
+            # остальные ошибки считаем окончательными
+            pending = [(season, episode) for season, episode, _, retryable in failed if retryable]
+            if not pending or retry == config.max_retries:
+                failed_downloads.extend(item[:3] for item in failed)
+                break
+            failed_downloads.extend(item[:3] for item in failed if not item[3])
+    except KeyboardInterrupt:
+        # Идущие загрузки прервутся на следующем блоке, а ещё не начатые
+        # эпизоды снимаем с очереди; не ждем потоки, чтобы сразу выйти
+        interrupted = True
+        download_cancelled.set()
+        raise
+    finally:
+        executor.shutdown(wait=not interrupted, cancel_futures=interrupted)
+    
+    failed_downloads.sort()
+    return len(episodes) - len(failed_downloads), failed_downloads
+
+def plan_series(rezka: HdRezkaApi, config: DownloadConfig, download_manager: DownloadManager,
+                series_title: str) -> Optional[DownloadPlan]:
+    """Выбор эпизодов, озвучки и качества без скачивания"""
+    # Получаем информацию о сериале
+    if not hasattr(rezka, 'seriesInfo') or not rezka.seriesInfo:
+        logger.error("Нет информации о сериале")
+        return None
+    
+    # Собираем информацию о сезонах и эпизодах за один проход:
+    # общий список сезонов и множества эпизодов каждого переводчика
+    all_seasons = defaultdict(set)
+    translator_seasons = {}
+    for tid, data in rezka.seriesInfo.items():
+        seasons = translator_seasons[tid] = {
+            int(season_num): frozenset(map(int, season_episodes))
+            for season_num, season_episodes in data.get('episodes', {}).items()
+        }
+        for season_num, season_episodes in seasons.items():
+            all_seasons[season_num] |= season_episodes
+    
+    # Номера приводим к int, чтобы сезон 10 не шел раньше сезона 2,
+    # и один раз сортируем в неизменяемые кортежи
+    all_seasons = {season: tuple(sorted(episodes)) for season, episodes in all_seasons.items()}
+    
+    # Выбор сезона/эпизода
+    sorted_seasons = tuple(sorted(all_seasons))
+    
+    lines = [
+        MENU_HEADER_FORMAT.format("Доступные сезоны:"),
+        MENU_ITEM_FORMAT.format(0, "Все сезоны")
+    ]
+    for i, season in enumerate(sorted_seasons, 1):
+        episode_count = len(all_seasons[season])
+        lines.append(MENU_ITEM_FORMAT.format(i, f"Сезон {season} ({episode_count} эпизодов)"))
+    print_lines(lines)
+    
+    season_choice = get_user_choice(PROMPT_FORMAT.format("Выберите сезон: "), len(sorted_seasons))
+    
+    # Определяем эпизоды для скачивания сразу по сезонам:
+    # в таком виде они нужны для проверки переводчиков
+    if season_choice == 0:
+        # Все сезоны
+        needed_episodes = {season: all_seasons[season] for season in sorted_seasons}
+    else:
+        # Конкретный сезон
+        selected_season = sorted_seasons[season_choice - 1]
+        season_episodes = all_seasons[selected_season]
         
-        # Выбираем переводчика
-        translator_id = select_translator(formatted_translators, config)
+        lines = [
+            MENU_HEADER_FORMAT.format(f"Эпизоды сезона {selected_season}:"),
+            MENU_ITEM_FORMAT.format(0, "Все эпизоды")
+        ]
+        lines += [MENU_ITEM_FORMAT.format(i, f"Эпизод {episode}") for i, episode in enumerate(season_episodes, 1)]
+        print_lines(lines)
         
-        # Получаем тестовый поток для определения качества
-        test_season, test_episode = episodes_to_download[0]
-        test_stream = rezka.getStream(test_season, test_episode, translation=translator_id)
+        episode_choice = get_user_choice(PROMPT_FORMAT.format("Выберите эпизод: "), len(season_episodes))
         
-        if not test_stream or not hasattr(test_stream, 'videos'):
-            logger.error("Не удалось получить тестовый поток")
+        if episode_choice == 0:
+            # Все эпизоды сезона
+            needed_episodes = {selected_season: season_episodes}
+        else:
+            # Конкретный эпизод
+            needed_episodes = {selected_season: (season_episodes[episode_choice - 1],)}
+    
+    episodes_to_download = [
+        (season, episode)
+        for season, episodes in needed_episodes.items()
+        for episode in episodes
+    ]
+    
+    # Находим подходящие переводчики, сравнивая нужные эпизоды
+    # с заранее собранными множествами целыми сезонами
+    valid_translators = {
+        tid: rezka.seriesInfo[tid]
+        for tid, seasons in translator_seasons.items()
+        if all(
+            season in seasons and seasons[season].issuperset(needed)
+            for season, needed in needed_episodes.items()
+        )
+    }
+    
+    if not valid_translators:
+        logger.error("Нет переводчиков с необходимыми эпизодами")
+        return None
+    
+    # Преобразуем формат для функции select_translator
+    formatted_translators = {}
+    for tid, data in valid_translators.items():
+        formatted_translators[tid] = {
+            "name": data.get("translator_name", "Без названия"),
+            "premium": data.get("premium", False)
+        }
+    
+    # Выбираем переводчика
+    translator_id = select_translator(formatted_translators, config)
+    
+    # Получаем тестовый поток для определения качества; он попадает в кэш,
+    # поэтому при скачивании первого эпизода повторного запроса не будет
+    test_season, test_episode = episodes_to_download[0]
+    test_stream = get_stream(rezka, translator_id, test_season, test_episode)
+    
+    if not test_stream or not hasattr(test_stream, 'videos'):
+        logger.error("Не удалось получить тестовый поток")
+        return None
+    
+    # Пока пользователь выбирает качество, в фоне устанавливаем
+    # соединение с CDN (DNS + TCP + TLS), чтобы первая загрузка
+    # стартовала на уже открытом сокете
+    qualities = list(test_stream.videos.keys())
+    if qualities and test_stream.videos[qualities[0]]:
+        Thread(
+            target=download_manager.warm_up,
+            args=(test_stream.videos[qualities[0]][0],),
+            daemon=True
+        ).start()
+    
+    # Выбираем качество
+    selected_quality = select_quality(qualities, config)
+    
+    # Создаем папку для скачивания
+    safe_title = sanitize_filename(series_title)
+    folder_path = Path(config.download_dir) / safe_title
+    folder_path.mkdir(parents=True, exist_ok=True)
+    
+    return DownloadPlan(
+        rezka=rezka,
+        translator_id=translator_id,
+        quality=selected_quality,
+        folder_path=folder_path,
+        episodes=episodes_to_download
+    )
+
+def execute_series_plan(plan: DownloadPlan, config: DownloadConfig,
+                        download_manager: DownloadManager) -> bool:
+    """Скачивание эпизодов по готовому плану с отчетом о результатах"""
+    # Скачиваем эпизоды
+    print(STATUS_FORMAT.format(f"Начинаем скачивание {len(plan.episodes)} эпизодов"))
+    
+    successful_downloads, failed_downloads = download_episodes(
+        plan.rezka, config, download_manager, plan.translator_id, plan.quality,
+        plan.folder_path, plan.episodes
+    )
+    
+    # Отчет о результатах
+    lines = [
+        SUCCESS_FORMAT.format("\nСкачивание завершено!"),
+        INFO_FORMAT.format(f"Успешно: {successful_downloads}"),
+        ERROR_FORMAT.format(f"Неудачно: {len(failed_downloads)}")
+    ]
+    
+    if failed_downloads:
+        lines.append(ERROR_FORMAT.format("\nНеудачные скачивания:"))
+        lines += [ERROR_FORMAT.format(f"S{season}E{episode}: {error}") for season, episode, error in failed_downloads]
+    print_lines(lines)
+    
+    return successful_downloads > 0
+
+def process_series(rezka: HdRezkaApi, config: DownloadConfig, download_manager: DownloadManager, 
+                  series_title: str) -> bool:
+    """Обработка сериала с улучшенной логикой"""
+    try:
+        # Сначала собираем все метаданные и выборы пользователя,
+        # затем одним пакетом скачиваем эпизоды
+        plan = plan_series(rezka, config, download_manager, series_title)
+        if plan is None:
             return False
         
-        # Выбираем качество
-        qualities = list(test_stream.videos.keys())
-        selected_quality = select_quality(qualities, config)
-        
-        # Создаем папку для скачивания
-        safe_title = sanitize_filename(series_title)
-        folder_path = Path(config.download_dir) / safe_title
-        folder_path.mkdir(parents=True, exist_ok=True)
-        
-        # Скачиваем эпизоды
-        print(f"{Fore.CYAN}Начинаем скачивание {len(episodes_to_download)} эпизодов{Style.RESET_ALL}")
-        
-        successful_downloads = 0
-        failed_downloads = []
-        
-        for season, episode in episodes_to_download:
-            try:
-                # Получаем поток для эпизода
-                stream = rezka.getStream(season, episode, translation=translator_id)
-                if not stream or selected_quality not in stream.videos:
-                    failed_downloads.append((season, episode, "Поток недоступен"))
-                    continue
-                
-                video_url = stream.videos[selected_quality][0]
-                filename = f"S{season:02d}E{episode:02d}_{selected_quality}.mp4"
-                filepath = folder_path / filename
-                
-                success, message = download_manager.download_file(
-                    video_url, str(filepath), f"S{season}E{episode}"
-                )
-                
-                if success:
-                    successful_downloads += 1
-                else:
-                    failed_downloads.append((season, episode, message))
-                    
-            except Exception as e:
-                failed_downloads.append((season, episode, str(e)))
-        
-        # Отчет о результатах
-        print(f"\n{Fore.GREEN}Скачивание завершено!{Style.RESET_ALL}")
-        print(f"{Fore.BLUE}Успешно: {successful_downloads}{Style.RESET_ALL}")
-        print(f"{Fore.RED}Неудачно: {len(failed_downloads)}{Style.RESET_ALL}")
-        
-        if failed_downloads:
-            print(f"\n{Fore.RED}Неудачные скачивания:{Style.RESET_ALL}")
-            for season, episode, error in failed_downloads:
-                print(f"{Fore.RED}S{season}E{episode}: {error}{Style.RESET_ALL}")
-        
-        return successful_downloads > 0
+        return execute_series_plan(plan, config, download_manager)
         
     except Exception as e:
-        logger.error(f"Ошибка при обработке сериала: {e}")
+        logger.error("Ошибка при обработке сериала: %s", e)
         return False
 
 def detect_content_type(rezka: HdRezkaApi) -> str:
     """Определение типа контента"""
+    # Свойства HdRezkaApi могут обращаться к сети, поэтому результат
+    # запоминаем на самом объекте
+    cached = getattr(rezka, '_detected_type', None)
+    if cached is not None:
+        return cached
+    
     try:
-        if hasattr(rezka, 'type'):
-            if rezka.type == Movie:
-                return "movie"
-            elif rezka.type == TVSeries:
-                return "series"
-        
+        content_type = getattr(rezka, 'type', None)
+        if content_type == Movie:
+            result = "movie"
+        elif content_type == TVSeries:
+            result = "series"
         # Альтернативный способ определения
-        if hasattr(rezka, 'seriesInfo') and rezka.seriesInfo:
-            return "series"
-        elif hasattr(rezka, 'translators') and rezka.translators:
-            return "movie"
-        
-        return "unknown"
+        elif getattr(rezka, 'seriesInfo', None):
+            result = "series"
+        elif getattr(rezka, 'translators', None):
+            result = "movie"
+        else:
+            result = "unknown"
         
     except Exception as e:
-        logger.error(f"Ошибка определения типа контента: {e}")
+        logger.error("Ошибка определения типа контента: %s", e)
         return "unknown"
+    
+    rezka._detected_type = result
+    return result
 
 def main():
     """Главная функция"""
@@ -503,78 +962,80 @@ def main():
         config.load_config()
         
         # Создаем менеджер скачивания
-        download_manager = DownloadManager(config)
-        
-        # Получаем URL
-        url = input(f"{Fore.YELLOW}Введите ссылку на HDRezka: {Style.RESET_ALL}").strip()
-        
-        if not url:
-            print(f"{Fore.RED}URL не может быть пустым{Style.RESET_ALL}")
-            return
-        
-        # Проверяем URL
-        parsed_url = urlparse(url)
-        if not parsed_url.scheme or not parsed_url.netloc:
-            print(f"{Fore.RED}Некорректный URL{Style.RESET_ALL}")
-            return
-        
-        clear_console()
-        
-        # Создаем объект API
-        print(f"{Fore.CYAN}Подключение к HDRezka...{Style.RESET_ALL}")
-        rezka = HdRezkaApi(url)
-        
-        # Проверяем успешность подключения
-        if not rezka.ok:
-            print(f"{Fore.RED}Ошибка подключения: {rezka.exception}{Style.RESET_ALL}")
-            return
-        
-        # Определяем тип контента
-        content_type = detect_content_type(rezka)
-        
-        if content_type == "unknown":
-            print(f"{Fore.RED}Не удалось определить тип контента{Style.RESET_ALL}")
-            return
-        
-        # Получаем название
-        content_name = "Unknown"
-        if hasattr(rezka, 'name') and rezka.name:
-            content_name = rezka.name
-        elif hasattr(rezka, 'title') and rezka.title:
-            content_name = rezka.title
-        
-        print(f"{Fore.GREEN}Найден {content_type}: {content_name}{Style.RESET_ALL}")
-        
-        # Обрабатываем контент
-        if content_type == "movie":
-            success = process_movie(rezka, config, download_manager, content_name)
-        elif content_type == "series":
-            success = process_series(rezka, config, download_manager, content_name)
-        else:
-            success = False
-        
-        # Показываем статистику
-        stats = download_manager.stats
-        print(f"\n{Fore.MAGENTA}Статистика скачивания:{Style.RESET_ALL}")
-        print(f"{Fore.BLUE}Всего попыток: {stats['total_downloads']}{Style.RESET_ALL}")
-        print(f"{Fore.GREEN}Успешно: {stats['successful_downloads']}{Style.RESET_ALL}")
-        print(f"{Fore.RED}Неудачно: {stats['failed_downloads']}{Style.RESET_ALL}")
-        print(f"{Fore.CYAN}Скачано байт: {stats['total_bytes']:,}{Style.RESET_ALL}")
-        
-        # Сохраняем конфигурацию
-        config.save_config()
-        
-        if success:
-            print(f"\n{Fore.GREEN}Операция завершена успешно!{Style.RESET_ALL}")
-        else:
-            print(f"\n{Fore.RED}Операция завершена с ошибками{Style.RESET_ALL}")
+        with contextlib.closing(DownloadManager(config)) as download_manager:
+            
+            # Получаем URL
+            url = input(WARNING_FORMAT.format("Введите ссылку на HDRezka: ")).strip()
+            
+            if not url:
+                print(ERROR_FORMAT.format("URL не может быть пустым"))
+                return
+            
+            # Проверяем URL
+            parsed_url = urlparse(url)
+            if not parsed_url.scheme or not parsed_url.netloc:
+                print(ERROR_FORMAT.format("Некорректный URL"))
+                return
+            
+            clear_console()
+            
+            # Создаем объект API
+            print(STATUS_FORMAT.format("Подключение к HDRezka..."))
+            rezka = HdRezkaApi(url)
+            
+            # Проверяем успешность подключения
+            if not rezka.ok:
+                print(ERROR_FORMAT.format(f"Ошибка подключения: {rezka.exception}"))
+                return
+            
+            # Определяем тип контента
+            content_type = detect_content_type(rezka)
+            
+            if content_type == "unknown":
+                print(ERROR_FORMAT.format("Не удалось определить тип контента"))
+                return
+            
+            # Получаем название
+            content_name = "Unknown"
+            if hasattr(rezka, 'name') and rezka.name:
+                content_name = rezka.name
+            elif hasattr(rezka, 'title') and rezka.title:
+                content_name = rezka.title
+            
+            print(SUCCESS_FORMAT.format(f"Найден {content_type}: {content_name}"))
+            
+            # Обрабатываем контент
+            if content_type == "movie":
+                success = process_movie(rezka, config, download_manager, content_name)
+            elif content_type == "series":
+                success = process_series(rezka, config, download_manager, content_name)
+            else:
+                success = False
+            
+            # Показываем статистику
+            stats = download_manager.stats
+            print_lines([
+                MENU_HEADER_FORMAT.format("\nСтатистика скачивания:"),
+                INFO_FORMAT.format(f"Всего попыток: {stats['total_downloads']}"),
+                SUCCESS_FORMAT.format(f"Успешно: {stats['successful_downloads']}"),
+                ERROR_FORMAT.format(f"Неудачно: {stats['failed_downloads']}"),
+                STATUS_FORMAT.format(f"Скачано байт: {stats['total_bytes']:,}")
+            ])
+            
+            # Сохраняем конфигурацию
+            config.save_config()
+            
+            if success:
+                print(SUCCESS_FORMAT.format("\nОперация завершена успешно!"))
+            else:
+                print(ERROR_FORMAT.format("\nОперация завершена с ошибками"))
             
     except KeyboardInterrupt:
-        print(f"\n{Fore.YELLOW}Операция прервана пользователем{Style.RESET_ALL}")
+        print(INTERRUPTED_MESSAGE)
         sys.exit(0)
     except Exception as e:
-        logger.error(f"Критическая ошибка: {e}")
-        print(f"{Fore.RED}Произошла критическая ошибка. Проверьте лог-файл.{Style.RESET_ALL}")
+        logger.error("Критическая ошибка: %s", e)
+        print(ERROR_FORMAT.format("Произошла критическая ошибка. Проверьте лог-файл."))
         sys.exit(1)
 
 if __name__ == "__main__":